@@ -0,0 +1,182 @@
+"""
+Helpers shared by the benchmarks: local git repositories standing in for the
+remote repository, configuration files and running dvcs-autosync (and
+autosync-server) as separate processes, just like they are used, or loading
+it as a module.
+"""
+
+import importlib.machinery, os, signal, socket, subprocess, sys, time, types
+
+TOPDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+DAEMON = os.path.join(TOPDIR, 'dvcs-autosync')
+SERVER = os.path.join(TOPDIR, 'autosync-server')
+
+# the [dvcs] section for git, as in .autosync-example
+GIT_COMMANDS = '''statuscmd = git status | grep -iq "nothing to commit"
+statuspathscmd = git diff-index --cached --quiet HEAD -- %s
+addcmd = git add %s
+rmcmd = git rm -r -q %s
+modifycmd = git add %s
+movecmd = git rm -q --cached --ignore-unmatch %s
+    git add %s
+movedircmd = git rm -r -q --cached --ignore-unmatch %s
+    git add %s
+startupcmd = git add -A
+commitcmd = git commit -q -m %s
+pushcmd = git push -q
+pullcmd = git pull -q --no-rebase --no-edit
+remoteurlcmd = git config --get remote.origin.url
+headcmd = git rev-parse HEAD
+pulledpathscmd = git diff --name-only --relative %s HEAD
+'''
+
+
+def load_daemon():
+    """
+    Load dvcs-autosync as a module, to benchmark its parts in-process. The
+    configuration globals are only set when it runs as a script.
+    """
+    loader = importlib.machinery.SourceFileLoader('autosync', DAEMON)
+    module = types.ModuleType(loader.name)
+    module.__file__ = DAEMON
+    loader.exec_module(module)
+    return module
+
+
+def git(args, cwd=None):
+    subprocess.check_call(['git'] + args, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def init_remote(path):
+    """
+    Create a bare repository at path with an initial commit.
+    """
+    git(['init', '-q', '--bare', path])
+    work = clone(path, path + '.init')
+    commit_files(work, ['README'])
+    return path
+
+
+def clone(remote, path):
+    git(['clone', '-q', remote, path])
+    for key, value in (('user.name', 'bench'), ('user.email', 'bench@localhost'), ('push.default', 'current')):
+        git(['config', key, value], path)
+    return path
+
+
+def write_files(repository, relpaths, content=None):
+    for relpath in relpaths:
+        path = os.path.join(repository, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content or '%s\n' % relpath)
+
+
+def commit_files(repository, relpaths):
+    """
+    Create the given files in repository, commit and push them.
+    """
+    write_files(repository, relpaths)
+    git(['add', '-A'], repository)
+    git(['commit', '-q', '-m', 'Add %d files' % len(relpaths)], repository)
+    git(['push', '-q', 'origin', 'HEAD'], repository)
+
+
+def commits(repository):
+    """
+    Return the number of commits in repository.
+    """
+    return int(subprocess.check_output(['git', 'rev-list', '--count', 'HEAD'], cwd=repository))
+
+
+def wait_until(condition, timeout, interval=0.05):
+    """
+    Wait until condition() returns something true and return it, or return
+    None after timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = condition()
+        if result:
+            return result
+        time.sleep(interval)
+    return None
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def write_config(filename, path, dvcs=GIT_COMMANDS, sections='', **options):
+    """
+    Write a configuration for watching path, with the given [autosync]
+    options (on top of defaults suitable for benchmarks), [dvcs] section and
+    further sections.
+    """
+    settings = {'pidfile': filename + '.pid', 'syncmethod': 'none', 'notifymethod': 'none',
+                'pulllock': 'conservative', 'readfrequency': 1, 'ignorepath': '.git'}
+    settings.update(options)
+    with open(filename, 'w') as f:
+        f.write('[autosync]\npath = %s\n' % path)
+        for name in sorted(settings):
+            f.write('%s = %s\n' % (name, settings[name]))
+        f.write('\n[dvcs]\n%s\n%s' % (dvcs, sections))
+    return filename
+
+
+class Process():
+    """
+    Runs a command in the background with its output going to logfile.
+    """
+    def __init__(self, args, logfile, env=None):
+        self.logfile = logfile
+        self._log = open(logfile, 'w')
+        self.popen = subprocess.Popen(args, stdout=self._log, stderr=subprocess.STDOUT, env=env)
+
+    def output(self):
+        with open(self.logfile, encoding='utf-8', errors='replace') as f:
+            return f.read()
+
+    def wait_for(self, text, timeout=60):
+        """
+        Wait until text shows up in the output, fail if it does not.
+        """
+        if not wait_until(lambda: text in self.output() or self.popen.poll() is not None, timeout) or text not in self.output():
+            sys.stderr.write(self.output())
+            raise RuntimeError('%s did not log "%s"' % (self.popen.args[1], text))
+
+    def stop(self):
+        if self.popen.poll() is None:
+            self.popen.send_signal(signal.SIGINT)
+            try:
+                self.popen.wait(10)
+            except subprocess.TimeoutExpired:
+                self.popen.kill()
+                self.popen.wait()
+        self._log.close()
+
+
+def start_daemon(config, logfile, args=(), env=None):
+    """
+    Start dvcs-autosync with config and wait until it is watching.
+    """
+    daemon = Process([sys.executable, DAEMON] + list(args) + [config], logfile, env)
+    daemon.wait_for('Executing startup synchronizaion')
+    return daemon
+
+
+def start_server(port, logfile):
+    server = Process([sys.executable, SERVER, '--port', str(port)], logfile)
+    if not wait_until(lambda: server.popen.poll() is not None or _listening(port), 10):
+        raise RuntimeError('autosync-server did not start')
+    return server
+
+
+def _listening(port):
+    try:
+        socket.create_connection(('127.0.0.1', port), 0.5).close()
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Creates 50000 files in a watched tree at once (like unpacking an archive) and
+reports the peak number of threads and the peak RSS of dvcs-autosync, and the
+time until all files are committed. To compare with another version, pass it
+with --daemon, e.g. after "git show <revision>:dvcs-autosync > /tmp/old".
+
+Usage: bench/many_files.py [--files N] [--daemon PATH]
+"""
+
+import argparse, os, shutil, subprocess, sys, tempfile, threading, time
+
+import harness
+
+
+def sample(pid, peaks, stop):
+    """
+    Record the peak values of Threads and VmRSS of process pid in peaks until
+    stop is set.
+    """
+    while not stop.is_set():
+        try:
+            with open('/proc/%d/status' % pid) as f:
+                for line in f:
+                    name, value = line.split(':', 1)
+                    if name in ('Threads', 'VmRSS'):
+                        peaks[name] = max(peaks.get(name, 0), int(value.split()[0]))
+        except (IOError, OSError):
+            return
+        time.sleep(0.1)
+
+
+def tracked_files(repository):
+    return subprocess.check_output(['git', 'ls-files', '-z'], cwd=repository).count(b'\0')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure threads, memory and commit time for many new files')
+    parser.add_argument('--files', type=int, default=50000, help='number of files to create (default: %(default)s)')
+    parser.add_argument('--daemon', default=harness.DAEMON, help='the dvcs-autosync script to run (default: this tree)')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='autosync-bench-')
+    daemon = None
+    try:
+        remote = harness.init_remote(os.path.join(tmpdir, 'origin.git'))
+        work = harness.clone(remote, os.path.join(tmpdir, 'work'))
+        config = harness.write_config(os.path.join(tmpdir, 'autosync.conf'), work)
+        daemon = harness.Process([sys.executable, args.daemon, config], os.path.join(tmpdir, 'autosync.log'))
+        daemon.wait_for('Executing startup synchronizaion')
+        time.sleep(2)
+        before, commits = tracked_files(work), harness.commits(work)
+
+        peaks = dict()
+        stop = threading.Event()
+        sampler = threading.Thread(target=sample, args=(daemon.popen.pid, peaks, stop))
+        sampler.start()
+        start = time.monotonic()
+        # 100 files per directory
+        harness.write_files(work, ['dir%d/file%d' % (i // 100, i) for i in range(args.files)])
+        created = time.monotonic() - start
+        committed = harness.wait_until(lambda: tracked_files(work) >= before + args.files, 1800, 0.5)
+        duration = time.monotonic() - start
+        stop.set()
+        sampler.join()
+
+        print('Created %d files in %.1f seconds' % (args.files, created))
+        if not committed:
+            sys.exit('Only %d of %d files were committed after %.0f seconds' % (tracked_files(work) - before, args.files, duration))
+        print('All committed after %.1f seconds with %d commits' % (duration, harness.commits(work) - commits))
+        print('Peak threads: %d, peak RSS: %.1f MB' % (peaks.get('Threads', 0), peaks.get('VmRSS', 0) / 1024.0))
+    finally:
+        if daemon:
+            daemon.stop()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Measures how long a change made on one instance takes to arrive at another,
+with the other instance pulling from the remote repository or directly from
+the announcing instance (peerfetchurl). The remote repository is a local bare
+repository behind a pullcmd that waits --origin-delay seconds (standing in for
+a far away server), the peer is the clone of the announcing instance itself
+(standing in for a git daemon on the local network). Both instances run
+against an autosync-server on localhost.
+
+Usage: bench/peer_fetch.py [--changes N] [--origin-delay SECONDS]
+"""
+
+import argparse, os, shutil, stat, sys, tempfile, time
+
+import harness
+
+
+def run(mode, args, tmpdir):
+    """
+    Return the propagation times of args.changes changes from one instance
+    to the other, which pulls from 'origin' or from the 'peer'.
+    """
+    remote = harness.init_remote(os.path.join(tmpdir, 'origin.git'))
+    slowpull = os.path.join(tmpdir, 'slowpull')
+    with open(slowpull, 'w') as f:
+        f.write('#!/bin/sh\nsleep %s\nexec git pull -q --no-rebase --no-edit\n' % args.origin_delay)
+    os.chmod(slowpull, stat.S_IRWXU)
+    dvcs = harness.GIT_COMMANDS.replace('pullcmd = git pull -q --no-rebase --no-edit', 'pullcmd = ' + slowpull)
+    dvcs += 'peerpullcmd = git pull -q --no-rebase --no-edit %s\n'
+
+    port = harness.free_port()
+    processes = [harness.start_server(port, os.path.join(tmpdir, 'server.log'))]
+    try:
+        clones = []
+        for name in ('a', 'b'):
+            work = harness.clone(remote, os.path.join(tmpdir, name))
+            options = dict(syncmethod='autosync-server', coalesceseconds=0.2, minpushinterval=0)
+            if mode == 'peer':
+                options['peerfetchurl'] = 'file://%s'
+            config = harness.write_config(os.path.join(tmpdir, name + '.conf'), work, dvcs,
+                                          '[autosync-server]\nserver = http://127.0.0.1:%d\n' % port, **options)
+            processes.append(harness.start_daemon(config, os.path.join(tmpdir, name + '.log')))
+            clones.append(work)
+        time.sleep(2 + args.origin_delay)
+
+        times = []
+        for i in range(args.changes):
+            relpath = 'change%d' % i
+            start = time.monotonic()
+            harness.write_files(clones[0], [relpath])
+            if not harness.wait_until(lambda: os.path.exists(os.path.join(clones[1], relpath)), 60):
+                sys.exit('Change %d did not arrive (%s)' % (i, mode))
+            times.append(time.monotonic() - start)
+            time.sleep(1)
+        return times
+    finally:
+        for process in reversed(processes):
+            process.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare pulling from the remote repository and from the announcing peer')
+    parser.add_argument('--changes', type=int, default=5, help='number of changes to propagate (default: %(default)s)')
+    parser.add_argument('--origin-delay', type=float, default=2, help='extra time each pull from the remote repository takes (default: %(default)s)')
+    args = parser.parse_args()
+
+    for mode in ('origin', 'peer'):
+        tmpdir = tempfile.mkdtemp(prefix='autosync-bench-')
+        try:
+            times = run(mode, args, tmpdir)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        print('Pulling from %-6s: change arrived after %.2f seconds on average, %.2f at most' % (mode, sum(times) / len(times), max(times)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Measures the memory held per pending path: 100000 paths get the events of
+an editor saving them several times folded into their PathState, each with
+a coalesce timer in the TimerScheduler, as FileChangeHandler._queue_action
+does. For comparison, the same events are also kept the way they were
+before folding: a list with one (maskname, action) tuple per event.
+
+Usage: bench/pending_memory.py [--paths N] [--saves N]
+"""
+
+import argparse, sys, tracemalloc
+
+import harness
+
+SAVE = [('IN_CREATE', 'add'), ('IN_CLOSE_WRITE', 'modify'), ('IN_ATTRIB', 'modify')]
+
+
+def measure(build):
+    """
+    Return the memory allocated by build() and still held by its result.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the memory held by pending paths')
+    parser.add_argument('--paths', type=int, default=100000, help='number of pending paths (default: %(default)s)')
+    parser.add_argument('--saves', type=int, default=10, help='number of times each path is saved (default: %(default)s)')
+    args = parser.parse_args()
+
+    autosync = harness.load_daemon()
+    autosync.cmd_add, autosync.cmd_modify = 'git add %s', 'git add %s'
+    scheduler = autosync.TimerScheduler()
+    relpaths = ['dir%d/file%d.txt' % (i // 100, i) for i in range(args.paths)]
+
+    def folded():
+        file_events = dict()
+        for relpath in relpaths:
+            relpath = sys.intern(relpath)
+            pathstate = file_events[relpath] = autosync.PathState(0)
+            parms = [relpath]
+            for i in range(args.saves):
+                for maskname, action in SAVE:
+                    pathstate.add_event(autosync.event_kinds[maskname], action, parms)
+            scheduler.schedule(('coalesce', '/work', relpath), 3600, None, relpath)
+        return file_events
+
+    def unfolded():
+        file_events = dict()
+        for relpath in relpaths:
+            events = file_events[relpath] = list()
+            for i in range(args.saves):
+                for maskname, action in SAVE:
+                    events.append((maskname, action))
+        return file_events
+
+    for name, build in (('PathState and timer', folded), ('list of event tuples', unfolded)):
+        used, result = measure(build)
+        print('%-22s %8.1f MB for %d paths, %4d bytes per path' % (name, used / 2.0**20, len(result), used // len(result)))
+
+
+if __name__ == '__main__':
+    main()
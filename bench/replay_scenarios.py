@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Replays canned file event scenarios through dvcs-autosync (see its --replay
+option) and reports events per second, commits, processes started and the
+p50/p99 latency from the first event of a file to its commit.
+
+Every scenario runs against a fresh clone of a local bare repository in a
+temporary directory, so neither your repositories nor any real remote are
+involved. With --backend fake, all DVCS commands are replaced by 'true', which
+leaves only the overhead of dvcs-autosync itself.
+
+Usage: bench/replay_scenarios.py [--backend git|fake] [--speed N] [scenario ...]
+"""
+
+import argparse, os, re, shutil, subprocess, sys, tempfile
+
+from harness import DAEMON, GIT_COMMANDS, clone, commit_files, init_remote, write_config
+
+# the inotify event masks, as recorded in traces
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_ISDIR = 0x40000000
+PULL = 0
+
+FAKE_COMMANDS = '''statuscmd = false
+addcmd = true %s
+rmcmd = true %s
+modifycmd = true %s
+movecmd = true %s %s
+startupcmd = true
+commitcmd = true %s
+pushcmd = true
+pullcmd = true
+remoteurlcmd = true
+headcmd = true
+pulledpathscmd = true %s
+'''
+
+
+class Trace():
+    """
+    Builds a trace in the format written by the tracefile option.
+    """
+    def __init__(self):
+        self.lines = []
+        self.millis = 0
+        self.cookie = 0
+
+    def wait(self, millis):
+        self.millis += millis
+
+    def event(self, mask, relpath, cookie=0):
+        self.lines.append('%d 0 %d %d %s\n' % (self.millis, mask, cookie, relpath))
+
+    def write_file(self, relpath):
+        self.event(IN_CREATE, relpath)
+        self.event(IN_CLOSE_WRITE, relpath)
+
+    def move(self, relpath, target, isdir=False):
+        self.cookie += 1
+        flags = IN_ISDIR if isdir else 0
+        self.event(IN_MOVED_FROM | flags, relpath, self.cookie)
+        self.event(IN_MOVED_TO | flags, target, self.cookie)
+
+    def save(self, filename):
+        with open(filename, 'w') as f:
+            f.writelines(self.lines)
+
+
+def save_storm(work, remote):
+    """
+    An editor saving the same file 200 times in 10 seconds, the way vim does
+    it: probe file, backup by renaming, write the new file, remove the backup.
+    """
+    commit_files(work, ['doc.txt'])
+    trace = Trace()
+    for i in range(200):
+        trace.write_file('4913')
+        trace.event(IN_DELETE, '4913')
+        trace.move('doc.txt', 'doc.txt~')
+        trace.write_file('doc.txt')
+        trace.event(IN_ATTRIB, 'doc.txt')
+        trace.event(IN_DELETE, 'doc.txt~')
+        trace.wait(50)
+    return trace
+
+
+def tarball_extract(work, remote):
+    """
+    Extracting an archive of 20 directories with 250 files each.
+    """
+    trace = Trace()
+    trace.event(IN_CREATE | IN_ISDIR, 'dist')
+    for i in range(20):
+        trace.event(IN_CREATE | IN_ISDIR, 'dist/dir%d' % i)
+        for j in range(250):
+            trace.write_file('dist/dir%d/file%d' % (i, j))
+            if j % 50 == 0:
+                trace.wait(1)
+    return trace
+
+
+def directory_move(work, remote):
+    """
+    Renaming a directory with 2000 committed files in 20 subdirectories.
+    """
+    commit_files(work, ['project/sub%d/file%d' % (i, j) for i in range(20) for j in range(100)])
+    trace = Trace()
+    trace.move('project', 'renamed', isdir=True)
+    return trace
+
+
+def concurrent_pull(work, remote):
+    """
+    Editing 100 files over 5 seconds while a pull of 500 files from another
+    clone happens in the middle. With --speed 0, the edits after the pull
+    are replayed once it is done.
+    """
+    commit_files(work, ['local%d' % i for i in range(100)])
+    other = clone(remote, os.path.join(os.path.dirname(work), 'other'))
+    commit_files(other, ['remote/file%d' % i for i in range(500)])
+    trace = Trace()
+    for i in range(100):
+        trace.event(IN_CLOSE_WRITE, 'local%d' % i)
+        if i == 50:
+            trace.event(PULL, '')
+        trace.wait(50)
+    return trace
+
+
+SCENARIOS = [save_storm, tarball_extract, directory_move, concurrent_pull]
+
+
+def run_scenario(scenario, backend, speed):
+    tmpdir = tempfile.mkdtemp(prefix='autosync-bench-')
+    try:
+        remote = init_remote(os.path.join(tmpdir, 'origin.git'))
+        work = clone(remote, os.path.join(tmpdir, 'work'))
+        trace = scenario(work, remote)
+        tracefile = os.path.join(tmpdir, 'trace')
+        trace.save(tracefile)
+
+        config = write_config(os.path.join(tmpdir, 'autosync.conf'), work, GIT_COMMANDS if backend == 'git' else FAKE_COMMANDS)
+        # the copies made by --replay end up in tmpdir as well
+        env = dict(os.environ, TMPDIR=tmpdir)
+        result = subprocess.run([sys.executable, DAEMON, '--replay', tracefile, '--speed', str(speed), config],
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env, timeout=600)
+        output = result.stdout.decode('utf-8', 'replace')
+        match = re.search(r'Replayed (\d+) events in ([\d.]+) seconds \((\d+) events per second\), all committed after ([\d.]+) seconds '
+                          r'with (\d+) commits and (\d+) processes started, event-to-commit latency p50 (\S+) p99 (\S+) seconds', output)
+        if not match:
+            sys.stderr.write(output)
+            raise RuntimeError('No report from the replay of %s' % scenario.__name__)
+        if match.group(7) == 'n/a':
+            # e.g. everything was committed by a re-scan
+            sys.stderr.write(output)
+            raise RuntimeError('The replay of %s did not commit any of its changes by itself' % scenario.__name__)
+        return match.groups()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay canned scenarios through dvcs-autosync')
+    parser.add_argument('scenarios', nargs='*', help='scenarios to run (default: all of %s)' % ', '.join(s.__name__ for s in SCENARIOS))
+    parser.add_argument('--backend', choices=('git', 'fake'), default='git',
+                        help='run the configured git commands or just true (default: %(default)s)')
+    parser.add_argument('--speed', type=float, default=1,
+                        help='replay this many times faster than the scenario, 0 for as fast as possible (default: %(default)s)')
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if not args.scenarios or s.__name__ in args.scenarios]
+    print('%-16s %8s %10s %10s %8s %10s %8s %8s' % ('scenario', 'events', 'events/s', 'committed', 'commits', 'processes', 'p50', 'p99'))
+    for scenario in scenarios:
+        events, duration, rate, committed, commits, processes, p50, p99 = run_scenario(scenario, args.backend, args.speed)
+        print('%-16s %8s %10s %9ss %8s %10s %8s %8s' % (scenario.__name__, events, rate, committed, commits, processes, p50, p99))
+
+
+if __name__ == '__main__':
+    main()
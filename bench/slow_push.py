@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Checks that local commits are not held up by a push to a slow remote: a
+pushcmd that sleeps before pushing is started, and while it runs, files are
+changed one after the other and the time until each change is committed is
+measured. Fails if any of them takes longer than --max-latency seconds.
+
+Usage: bench/slow_push.py [--push-seconds N] [--changes N] [--max-latency N]
+"""
+
+import argparse, os, shutil, stat, sys, tempfile, time
+
+import harness
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure commit latency during a slow push')
+    parser.add_argument('--push-seconds', type=float, default=20, help='how long each push takes (default: %(default)s)')
+    parser.add_argument('--changes', type=int, default=5, help='number of changes to commit during the push (default: %(default)s)')
+    parser.add_argument('--max-latency', type=float, default=5, help='maximum time to commit a change (default: %(default)s)')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='autosync-bench-')
+    daemon = server = None
+    try:
+        remote = harness.init_remote(os.path.join(tmpdir, 'origin.git'))
+        work = harness.clone(remote, os.path.join(tmpdir, 'work'))
+        started, finished = os.path.join(tmpdir, 'push-started'), os.path.join(tmpdir, 'push-finished')
+        pushcmd = os.path.join(tmpdir, 'slowpush')
+        with open(pushcmd, 'w') as f:
+            f.write('#!/bin/sh\ntouch %s\nsleep %s\ngit push -q\ntouch %s\n' % (started, args.push_seconds, finished))
+        os.chmod(pushcmd, stat.S_IRWXU)
+
+        # pushes are only made with a synchronization method
+        port = harness.free_port()
+        server = harness.start_server(port, os.path.join(tmpdir, 'server.log'))
+        config = harness.write_config(os.path.join(tmpdir, 'autosync.conf'), work,
+                                      dvcs=harness.GIT_COMMANDS.replace('pushcmd = git push -q', 'pushcmd = ' + pushcmd),
+                                      sections='[autosync-server]\nserver = http://127.0.0.1:%d\n' % port,
+                                      syncmethod='autosync-server', coalesceseconds=0.5)
+        daemon = harness.start_daemon(config, os.path.join(tmpdir, 'autosync.log'))
+        time.sleep(2)
+
+        harness.write_files(work, ['first'])
+        if not harness.wait_until(lambda: os.path.exists(started), 30):
+            sys.exit('The push was not started')
+        print('Push started, taking %.0f seconds' % args.push_seconds)
+
+        latencies = []
+        for i in range(args.changes):
+            count = harness.commits(work)
+            start = time.monotonic()
+            harness.write_files(work, ['change%d' % i])
+            if not harness.wait_until(lambda: harness.commits(work) > count, args.push_seconds * 2):
+                sys.exit('Change %d was not committed' % i)
+            latencies.append(time.monotonic() - start)
+            in_flight = not os.path.exists(finished)
+            print('Change %d committed after %.2f seconds%s' % (i, latencies[-1], '' if in_flight else ' (push already finished)'))
+            if not in_flight:
+                break
+
+        print('Commit latency during the push: max %.2f, mean %.2f seconds' % (max(latencies), sum(latencies) / len(latencies)))
+        if max(latencies) > args.max_latency:
+            sys.exit('Commits took longer than %.1f seconds while pushing' % args.max_latency)
+    finally:
+        if daemon:
+            daemon.stop()
+        if server:
+            server.stop()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Measures the startup of dvcs-autosync for each combination of sync method and
+notification method: the total import time (from python -X importtime), the
+time until the first watch is in place and the RSS at that point. Methods
+whose libraries are not installed are reported as failed.
+
+Usage: bench/startup_time.py [--runs N]
+"""
+
+import argparse, os, re, shutil, sys, tempfile, time
+
+import harness
+
+CONFIGURATIONS = [('none', 'none'), ('none', 'desktop'), ('autosync-server', 'none'), ('xmpp', 'none'), ('xmpp', 'all')]
+
+
+def rss(pid):
+    with open('/proc/%d/status' % pid) as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024.0
+    return 0
+
+
+def measure(tmpdir, work, port, syncmethod, notifymethod):
+    """
+    Start dvcs-autosync once and return the import time, the time until it
+    watches the tree (both in seconds) and its RSS in MB, or the last line it
+    logged if it did not get that far.
+    """
+    config = harness.write_config(os.path.join(tmpdir, 'autosync.conf'), work,
+                                  sections='[autosync-server]\nserver = http://127.0.0.1:%d\n\n'
+                                           '[xmpp]\nusername = bench@localhost\npassword = bench\nalsonotify = bench@localhost\n' % port,
+                                  syncmethod=syncmethod, notifymethod=notifymethod)
+    start = time.monotonic()
+    daemon = harness.Process([sys.executable, '-X', 'importtime', harness.DAEMON, config], os.path.join(tmpdir, 'autosync.log'))
+    try:
+        watching = harness.wait_until(lambda: 'Start monitoring' in daemon.output() or daemon.popen.poll() is not None, 60)
+        if not watching or 'Start monitoring' not in daemon.output():
+            lines = [line for line in daemon.output().splitlines() if not line.startswith('import time:')]
+            return lines[-1] if lines else 'no output'
+        elapsed = time.monotonic() - start
+        memory = rss(daemon.popen.pid)
+    finally:
+        daemon.stop()
+    # the cumulative times of the top level imports add up to the total
+    imports = sum(int(match.group(1)) for match in re.finditer(r'^import time:\s+\d+ \|\s+(\d+) \| \S', daemon.output(), re.M))
+    return imports / 1e6, elapsed, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the startup time of each configuration')
+    parser.add_argument('--runs', type=int, default=3, help='number of starts per configuration, the fastest counts (default: %(default)s)')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix='autosync-bench-')
+    server = None
+    try:
+        remote = harness.init_remote(os.path.join(tmpdir, 'origin.git'))
+        work = harness.clone(remote, os.path.join(tmpdir, 'work'))
+        port = harness.free_port()
+        server = harness.start_server(port, os.path.join(tmpdir, 'server.log'))
+
+        print('%-16s %-12s %10s %14s %8s' % ('syncmethod', 'notifymethod', 'imports', 'first watch', 'RSS'))
+        for syncmethod, notifymethod in CONFIGURATIONS:
+            results = [measure(tmpdir, work, port, syncmethod, notifymethod) for i in range(args.runs)]
+            failures = [result for result in results if isinstance(result, str)]
+            if failures:
+                print('%-16s %-12s %10s: %s' % (syncmethod, notifymethod, 'failed', failures[0]))
+                continue
+            imports, elapsed, memory = min(results)
+            print('%-16s %-12s %9.3fs %13.3fs %6.1fMB' % (syncmethod, notifymethod, imports, elapsed, memory))
+    finally:
+        if server:
+            server.stop()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -39,7 +39,7 @@ setup(name=SCRIPT,
       license=LICENSE,
       url=WEBSITE,
 
-      scripts= [SCRIPT],
+      scripts= [SCRIPT, 'autosync-server'],
       # TODO: remove when we use the upstream Jabberbot
       data_files = [('share/' + SCRIPT, ['jabberbot.py', 'autosync-xdg-launcher.sh']),
                     ('share/applications', [SCRIPT + '.desktop']),
@@ -0,0 +1,54 @@
+"""
+Tests for running the configured commands for several files at once
+(FileChangeHandler._exec_batch in dvcs-autosync).
+"""
+
+import importlib.machinery, logging, os, shutil, tempfile, types, unittest
+
+DAEMON = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dvcs-autosync')
+loader = importlib.machinery.SourceFileLoader('autosync', DAEMON)
+autosync = types.ModuleType(loader.name)
+autosync.__file__ = DAEMON
+loader.exec_module(autosync)
+
+
+class ExecBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = tempfile.mkdtemp(prefix='autosync-test-')
+        self.handler = autosync.FileChangeHandler(self.cwd, autosync.GitIgnoreMatcher(self.cwd))
+        logging.disable(logging.WARNING)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(self.cwd)
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.cwd, name))
+
+    def test_single_entry_continues_after_failure(self):
+        failed = self.handler._exec_batch('false %s\ntouch %s', [['a', 'b']])
+        self.assertEqual(failed, [['a', 'b']])
+        self.assertTrue(self.exists('b'))
+
+    def test_many_entries_continue_after_failure(self):
+        failed = self.handler._exec_batch('false %s\ntouch %s', [['a', 'b'], ['c', 'd']])
+        self.assertEqual(failed, [['a', 'b'], ['c', 'd']])
+        self.assertTrue(self.exists('b'))
+        self.assertTrue(self.exists('d'))
+
+    def test_only_failed_entries_are_returned(self):
+        self.handler._exec_batch('touch %s', [['a'], ['c']])
+        failed = self.handler._exec_batch('ls %s', [['a'], ['missing'], ['c']])
+        self.assertEqual(failed, [['missing']])
+
+    def test_lines_with_two_parameters_run_per_entry(self):
+        self.handler._exec_batch('touch %s', [['a'], ['c']])
+        failed = self.handler._exec_batch('mv %s %s\ntouch %s', [['a', 'b', 'x'], ['missing', 'd', 'y']])
+        self.assertEqual(failed, [['missing', 'd', 'y']])
+        self.assertTrue(self.exists('b'))
+        self.assertTrue(self.exists('x'))
+        self.assertTrue(self.exists('y'))
+
+
+if __name__ == '__main__':
+    unittest.main()
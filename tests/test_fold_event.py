@@ -0,0 +1,89 @@
+"""
+Tests for folding the events of a file into its final action (fold_event and
+PathState in dvcs-autosync).
+"""
+
+import importlib.machinery, os, types, unittest
+
+DAEMON = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dvcs-autosync')
+loader = importlib.machinery.SourceFileLoader('autosync', DAEMON)
+autosync = types.ModuleType(loader.name)
+autosync.__file__ = DAEMON
+loader.exec_module(autosync)
+
+CREATE, DELETE, MODIFY, MOVE = autosync.EVENT_CREATE, autosync.EVENT_DELETE, autosync.EVENT_MODIFY, autosync.EVENT_MOVE
+
+
+def fold(*kinds):
+    state = 0
+    for kind in kinds:
+        state = autosync.fold_event(state, kind)
+    return state
+
+
+class FoldEventTest(unittest.TestCase):
+    def test_first_event_determines_initial_state(self):
+        for kind in (CREATE, DELETE, MODIFY, MOVE):
+            self.assertEqual(fold(kind), kind)
+
+    def test_add_has_priority(self):
+        self.assertEqual(fold(MODIFY, CREATE), CREATE)
+        self.assertEqual(fold(CREATE, MODIFY), CREATE)
+        self.assertEqual(fold(CREATE, DELETE), CREATE)
+        self.assertEqual(fold(CREATE, MOVE), CREATE)
+
+    def test_move_is_kept(self):
+        self.assertEqual(fold(MOVE, MODIFY), MOVE)
+        self.assertEqual(fold(MOVE, CREATE), MOVE)
+
+    def test_move_then_rm_is_rm(self):
+        self.assertEqual(fold(MOVE, DELETE), DELETE)
+        self.assertEqual(fold(MOVE, DELETE, CREATE), MODIFY | autosync.STATE_FINAL)
+
+    def test_modify_has_priority_over_rm(self):
+        self.assertEqual(fold(MODIFY, DELETE), MODIFY)
+        self.assertEqual(fold(DELETE, MODIFY), MODIFY)
+
+    def test_rm_then_add_is_final_modification(self):
+        state = fold(DELETE, CREATE)
+        self.assertEqual(state, MODIFY | autosync.STATE_FINAL)
+        for kind in (CREATE, DELETE, MODIFY, MOVE):
+            self.assertEqual(autosync.fold_event(state, kind), state)
+
+    def test_repeated_events_keep_state(self):
+        for kind in (CREATE, DELETE, MODIFY, MOVE):
+            self.assertEqual(fold(*[kind] * 500), kind)
+
+    def test_every_state_folds_every_kind(self):
+        kinds = (CREATE, DELETE, MODIFY, MOVE)
+        for state in (0,) + kinds + (MODIFY | autosync.STATE_FINAL,):
+            for kind in kinds:
+                self.assertIn(autosync.fold_event(state, kind) & ~autosync.STATE_FINAL, kinds)
+
+
+class PathStateTest(unittest.TestCase):
+    def setUp(self):
+        autosync.cmd_modify = 'modify %s'
+
+    def test_action_of_deciding_event_is_kept(self):
+        pathstate = autosync.PathState(0)
+        pathstate.add_event(MODIFY, 'modify %s', ['a'])
+        pathstate.add_event(CREATE, 'add %s', ['b'])
+        pathstate.add_event(MODIFY, 'modify %s', ['c'])
+        self.assertEqual((pathstate.state, pathstate.action, pathstate.parms), (CREATE, 'add %s', ['b']))
+
+    def test_rm_then_add_uses_modify_command(self):
+        pathstate = autosync.PathState(0)
+        pathstate.add_event(DELETE, 'rm %s', ['a'])
+        pathstate.add_event(CREATE, 'add %s', ['a'])
+        self.assertEqual(pathstate.action, 'modify %s')
+
+    def test_move_then_rm_removes_source(self):
+        pathstate = autosync.PathState(0)
+        pathstate.add_event(MOVE, 'move %s %s', ['a', 'b'])
+        pathstate.add_event(DELETE, 'rm %s', ['b'])
+        self.assertEqual((pathstate.state, pathstate.action, pathstate.parms), (DELETE, 'rm %s', ['a']))
+
+
+if __name__ == '__main__':
+    unittest.main()
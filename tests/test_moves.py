@@ -0,0 +1,150 @@
+"""
+Tests for committing renames as editors and tools do them, with real inotify
+events passed through LinuxFileChangeHandlerAdapter and the git commands from
+.autosync-example.
+"""
+
+import concurrent.futures, configparser, importlib.machinery, logging, os, shutil, subprocess, tempfile, time, types, unittest
+
+TOPDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+DAEMON = os.path.join(TOPDIR, 'dvcs-autosync')
+loader = importlib.machinery.SourceFileLoader('autosync', DAEMON)
+autosync = types.ModuleType(loader.name)
+autosync.__file__ = DAEMON
+loader.exec_module(autosync)
+
+try:
+    import pyinotify
+except ImportError:
+    pyinotify = None
+
+MASK = 0
+if pyinotify:
+    MASK = (pyinotify.IN_DELETE | pyinotify.IN_CREATE | pyinotify.IN_CLOSE_WRITE | pyinotify.IN_ATTRIB |
+            pyinotify.IN_MOVED_FROM | pyinotify.IN_MOVED_TO | pyinotify.IN_MOVE_SELF | pyinotify.IN_DONT_FOLLOW | pyinotify.IN_ONLYDIR)
+
+
+def git(cwd, *args):
+    return subprocess.check_output(['git'] + list(args), cwd=cwd, stderr=subprocess.STDOUT).decode('utf-8')
+
+
+@unittest.skipUnless(pyinotify and shutil.which('git'), 'needs pyinotify and git')
+class MoveTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        example = configparser.RawConfigParser()
+        example.read(os.path.join(TOPDIR, '.autosync-example'))
+        autosync.cmd_status = example.get('dvcs', 'statuscmd')
+        autosync.cmd_status_paths = example.get('dvcs', 'statuspathscmd')
+        autosync.cmd_add = example.get('dvcs', 'addcmd')
+        autosync.cmd_rm = example.get('dvcs', 'rmcmd')
+        autosync.cmd_modify = example.get('dvcs', 'modifycmd')
+        autosync.cmd_move = example.get('dvcs', 'movecmd')
+        autosync.cmd_move_dir = example.get('dvcs', 'movedircmd')
+        autosync.cmd_commit = example.get('dvcs', 'commitcmd')
+        autosync.coalesce_seconds = 0.2
+        autosync.move_pairing_seconds = 0.1
+        autosync.hostname = 'test'
+        autosync.syncmethod = 'none'
+        autosync.scheduler = autosync.TimerScheduler()
+        autosync.scheduler.start()
+        autosync.dvcs_workers = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        logging.disable(logging.WARNING)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+        autosync.scheduler.kill()
+        autosync.dvcs_workers.shutdown()
+
+    def setUp(self):
+        self.cwd = tempfile.mkdtemp(prefix='autosync-test-')
+        git(self.cwd, 'init', '-q')
+        git(self.cwd, 'config', 'user.name', 'test')
+        git(self.cwd, 'config', 'user.email', 'test@localhost')
+        self.write('doc.txt', 'document\n')
+        self.write('foo', 'foo\n')
+        git(self.cwd, 'add', '-A')
+        git(self.cwd, 'commit', '-q', '-m', 'initial')
+
+        self.handler = autosync.FileChangeHandler(self.cwd, autosync.GitIgnoreMatcher(self.cwd), [os.path.join(self.cwd, '.git')])
+        self.wm = pyinotify.WatchManager()
+        adapter = autosync.LinuxFileChangeHandlerAdapter(handler=self.handler, watchmanager=self.wm)
+        self.notifier = pyinotify.ThreadedNotifier(self.wm)
+        self.notifier.daemon = True
+        self.notifier.start()
+        self.wm.add_watch(self.cwd, MASK, proc_fun=adapter, rec=True, auto_add=True,
+                          exclude_filter=lambda path: path.startswith(os.path.join(self.cwd, '.git')))
+
+    def tearDown(self):
+        self.notifier.stop()
+        shutil.rmtree(self.cwd)
+
+    def path(self, relpath):
+        return os.path.join(self.cwd, relpath)
+
+    def write(self, relpath, content):
+        with open(self.path(relpath), 'w') as f:
+            f.write(content)
+
+    def wait_until_committed(self, timeout=10):
+        """
+        Wait until all events have been handled and nothing is left to commit.
+        """
+        deadline = time.monotonic() + timeout
+        quiet = 0
+        while time.monotonic() < deadline:
+            idle = self.handler.is_idle() and autosync.statistics.get('queued_operations') == 0
+            quiet = quiet + 1 if idle else 0
+            if quiet >= 5:
+                return
+            time.sleep(0.1)
+        self.fail('events were not handled within %d seconds' % timeout)
+
+    def assertCommitted(self, relpath, content):
+        with open(self.path(relpath)) as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual(git(self.cwd, 'show', 'HEAD:' + relpath), content)
+        self.assertEqual(git(self.cwd, 'status', '--porcelain'), '')
+
+    def test_backup_rename_then_rewrite(self):
+        # vim: rename to a backup, write the file anew, remove the backup
+        os.rename(self.path('doc.txt'), self.path('doc.txt~'))
+        self.write('doc.txt', 'document\nedited\n')
+        os.remove(self.path('doc.txt~'))
+        self.wait_until_committed()
+        self.assertCommitted('doc.txt', 'document\nedited\n')
+
+    def test_backup_rename_then_rewrite_unchanged(self):
+        os.rename(self.path('doc.txt'), self.path('doc.txt~'))
+        self.write('doc.txt', 'document\n')
+        os.remove(self.path('doc.txt~'))
+        self.wait_until_committed()
+        self.assertCommitted('doc.txt', 'document\n')
+
+    def test_temporary_file_renamed_over_file(self):
+        # atomic save: write a temporary file and rename it over the original
+        self.write('.foo.tmp', 'foo\nedited\n')
+        os.rename(self.path('.foo.tmp'), self.path('foo'))
+        self.wait_until_committed()
+        self.assertCommitted('foo', 'foo\nedited\n')
+
+    def test_move_of_tracked_file(self):
+        os.rename(self.path('foo'), self.path('bar'))
+        self.wait_until_committed()
+        self.assertCommitted('bar', 'foo\n')
+        self.assertNotIn('foo', git(self.cwd, 'ls-files').split())
+
+    def test_new_directory_renamed(self):
+        os.mkdir(self.path('tmp'))
+        for i in range(3):
+            self.write('tmp/f%d' % i, 'file %d\n' % i)
+        os.rename(self.path('tmp'), self.path('final'))
+        self.wait_until_committed()
+        for i in range(3):
+            self.assertCommitted('final/f%d' % i, 'file %d\n' % i)
+        self.assertEqual(git(self.cwd, 'ls-files', 'tmp'), '')
+
+
+if __name__ == '__main__':
+    unittest.main()